@@ -1,17 +1,68 @@
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, request, send_file
 from flask_cors import CORS
 import serial
 import serial.tools.list_ports
 import threading
+import itertools
 import time
-from datetime import datetime
 import math
 import os
 import socket
 import ssl
+import subprocess
+import functools
+import hashlib
+import logging
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+try:
+    from sklearn.neighbors import BallTree
+except ImportError:
+    BallTree = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+try:
+    from cheroot.wsgi import Server as WSGIServer
+    from cheroot.ssl.builtin import BuiltinSSLAdapter
+except ImportError:
+    WSGIServer = None
+
+# Per-sample/per-fix messages go to debug so the hot paths skip console I/O
+logging.basicConfig(level=logging.WARNING, format="%(message)s")
+logger = logging.getLogger("eco")
 
 app = Flask(__name__)
 CORS(app)
+if Compress is not None:
+    Compress(app)
+
+
+def ojson(obj, status=200):
+    """JSON response encoded with orjson when available (falls back to jsonify)"""
+    if orjson is None:
+        resp = jsonify(obj)
+        resp.status_code = status
+        return resp
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
 
 # ============================================
 # ARDUINO AUTO-DETECTION
@@ -27,6 +78,12 @@ def find_arduino():
             for attempt in range(3):
                 try:
                     ser = serial.Serial(port.device, 9600, timeout=1, write_timeout=1)
+                    if hasattr(ser, 'set_low_latency_mode'):
+                        try:
+                            # Linux: deliver bytes as soon as they arrive (ASYNC_LOW_LATENCY)
+                            ser.set_low_latency_mode(True)
+                        except (OSError, ValueError):
+                            pass
                     time.sleep(2.5)
                     print(f"✅ Arduino connected on {port.device}")
                     return ser
@@ -62,13 +119,15 @@ def get_local_ip():
     except:
         return "localhost"
 
+# Resolved once; the address does not change while the server runs
+LOCAL_IP = get_local_ip()
+
 # ============================================
 # CREATE SELF-SIGNED SSL CERTIFICATE
 # ============================================
+@functools.lru_cache(maxsize=1)
 def create_ssl_cert():
-    """Create a self-signed SSL certificate for HTTPS"""
-    import subprocess
-    
+    """Create a self-signed SSL certificate for HTTPS (checked once per process)"""
     cert_file = 'cert.pem'
     key_file = 'key.pem'
     
@@ -85,10 +144,10 @@ def create_ssl_cert():
             '-keyout', key_file, '-out', cert_file,
             '-days', '365', '-nodes',
             '-subj', '/CN=localhost'
-        ], check=True, capture_output=True)
+        ], check=True, capture_output=True, timeout=30)
         print("✅ SSL certificates created")
         return cert_file, key_file
-    except:
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
         print("⚠️  OpenSSL not found. Install OpenSSL or use HTTP (GPS won't work on phone)")
         return None, None
 
@@ -113,9 +172,53 @@ dustbins = {
 truck = {
     "lat": None,
     "lon": None,
-    "timestamp": None
+    "timestamp": None  # time.time() of the last stored fix
 }
 
+# GPS fixes arriving faster than this are dropped unless the truck moved
+TRUCK_MIN_INTERVAL_S = 0.2
+TRUCK_MIN_MOVE_KM = 0.005
+
+# Guards `dustbins` and `truck`; readers work on copies (see snapshot_state)
+_state_lock = threading.Lock()
+_next_id = itertools.count(2)  # dustbin ids are never reused
+
+
+# Bin coordinates as one contiguous float32 (lat, lon) table for the route
+# code; id_to_row maps a bin id to its row, freed rows are reused
+coord_table = np.empty((64, 2), dtype=np.float32)
+id_to_row = {}
+_free_rows = []
+
+
+def snapshot_state():
+    """Copy `dustbins` and `truck` under the lock so handlers never hold it while working"""
+    with _state_lock:
+        return {k: v.copy() for k, v in dustbins.items()}, truck.copy()
+
+
+def _store_coords(bin_id, lat, lon):
+    """Write a bin's coordinates into coord_table (call with _state_lock held)"""
+    global coord_table
+    if bin_id not in id_to_row:
+        if _free_rows:
+            row = _free_rows.pop()
+        else:
+            row = len(id_to_row)
+            if row == len(coord_table):
+                coord_table = np.concatenate((coord_table, np.empty_like(coord_table)))
+        id_to_row[bin_id] = row
+    coord_table[id_to_row[bin_id]] = (lat, lon)
+
+
+def _drop_coords(bin_id):
+    """Release a bin's coord_table row (call with _state_lock held)"""
+    _free_rows.append(id_to_row.pop(bin_id))
+
+
+for _bid, _b in dustbins.items():
+    _store_coords(_bid, _b["lat"], _b["lon"])
+
 
 # ============================================
 # ROUTE OPTIMIZATION - TSP ALGORITHM
@@ -154,12 +257,18 @@ truck = {
 #         current = nearest
 #     return route, total_distance
 
+EARTH_RADIUS_KM = 6371.0
+MATRIX_MAX_BINS = 2000    # above this the full distance matrix gets too large
+BALLTREE_MIN_BINS = 5000  # below this the vectorized scan is faster
+PLANAR_MAX_SPAN_DEG = 1.0  # ~100 km; wider routes always use Haversine
+
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     """
     Calculate geodesic distance (in kilometers) between two GPS points
     using the Haversine formula.
     """
-    R = 6371.0  # Earth's radius in km
+    R = EARTH_RADIUS_KM
 
     lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
 
@@ -174,12 +283,255 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     return R * c
 
 
-def optimize_route_tsp(truck_pos, bins):
+def bin_coords(points):
+    """(N, 2) float32 array of (lat, lon) degrees for a list of { "lat", "lon" } points"""
+    return np.array([(p["lat"], p["lon"]) for p in points], dtype=np.float32).reshape(-1, 2)
+
+
+def _with_truck(truck_pos, coords):
+    """Prepend the truck position as row 0, keeping the coordinate dtype"""
+    start = np.array([[truck_pos["lat"], truck_pos["lon"]]], dtype=coords.dtype)
+    return np.concatenate((start, coords))
+
+
+def _prep(coords):
+    """
+    Radian latitudes, longitudes and cos(latitude) for an (N, 2) array of
+    (lat, lon) degrees, computed once per route.
+    """
+    rad = np.radians(coords)
+    return rad[:, 0], rad[:, 1], np.cos(rad[:, 0])
+
+
+def haversine_np(lat1, lon1, cos_lat1, lats, lons, cos_lats):
+    """
+    Vectorized Haversine: distance (km) from one point to many points.
+
+    Coordinates are in radians and cos_lat* are their cached cosines
+    (see _prep); arguments may be NumPy arrays of any broadcastable shape.
+    """
+    dlat = lats - lat1
+    dlon = lons - lon1
+
+    a = (np.sin(dlat / 2)**2 +
+         cos_lat1 * cos_lats * np.sin(dlon / 2)**2)
+
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def path_distance(coords):
+    """Total length (km) of the path visiting the (lat, lon) rows of coords in order"""
+    if len(coords) < 2:
+        return 0.0
+    lats, lons, cos_lats = _prep(coords)
+    return float(haversine_np(lats[:-1], lons[:-1], cos_lats[:-1],
+                              lats[1:], lons[1:], cos_lats[1:]).sum())
+
+
+def haversine_matrix(lats, lons, cos_lats):
+    """Pairwise Haversine distances (km) between all radian coordinates, shape (N, N)"""
+    return haversine_np(lats[:, None], lons[:, None], cos_lats[:, None],
+                        lats[None, :], lons[None, :], cos_lats[None, :])
+
+
+def planar_matrix(coords):
+    """
+    Pairwise distances (km) on an equirectangular projection around the
+    centroid, computed with SimSIMD. Only meant for city-scale extents,
+    where it stays within a fraction of a percent of Haversine.
+    """
+    rad = np.radians(coords)
+    rad -= rad.mean(axis=0)
+    xy = np.empty_like(rad)
+    xy[:, 0] = rad[:, 0] * EARTH_RADIUS_KM
+    xy[:, 1] = rad[:, 1] * EARTH_RADIUS_KM * np.cos(np.radians(coords[:, 0].mean()))
+    return np.asarray(simsimd.cdist(xy, xy, "euclidean", out_dtype="float32"))
+
+
+def _nn_order_scan(lats, lons, cos_lats):
+    """
+    Nearest Neighbor visiting order via one vectorized scan per step.
+
+    Index 0 is the truck, 1..N are the bins. Returns bin indices
+    (0-based) and total km.
+    """
+    cur_lat, cur_lon, cur_cos = lats[0], lons[0], cos_lats[0]
+    lats_rad, lons_rad, cos_rad = lats[1:], lons[1:], cos_lats[1:]
+    visited = np.zeros(len(lats_rad), dtype=bool)
+    order = []
+    total_distance = 0.0
+
+    for _ in range(len(lats_rad)):
+        # Distance to every unvisited bin at once
+        dist = haversine_np(cur_lat, cur_lon, cur_cos, lats_rad, lons_rad, cos_rad)
+        dist[visited] = np.inf
+        nearest = int(np.argmin(dist))
+
+        total_distance += float(dist[nearest])
+
+        # Move to next bin
+        order.append(nearest)
+        visited[nearest] = True
+        cur_lat, cur_lon, cur_cos = lats_rad[nearest], lons_rad[nearest], cos_rad[nearest]
+
+    return order, total_distance
+
+
+def _nn_order_matrix(D):
     """
-    Solve a basic TSP using the Nearest Neighbor heuristic.
+    Nearest Neighbor visiting order over a precomputed distance matrix.
+
+    Row/column 0 is the truck, 1..N are the bins. Returns bin indices
+    (0-based) and total km.
+    """
+    avail = np.ones(len(D), dtype=bool)
+    avail[0] = False
+    order = []
+    cur = 0
+    total_distance = 0.0
+
+    for _ in range(len(D) - 1):
+        candidates = np.flatnonzero(avail)
+        nearest = int(candidates[np.argmin(D[cur, candidates])])
+
+        total_distance += float(D[cur, nearest])
+
+        order.append(nearest - 1)
+        avail[nearest] = False
+        cur = nearest
+
+    return order, total_distance
+
+
+def _nn_tour(D):
+    """Same as _nn_order_matrix as a flat loop; JIT-compiled when Numba is available"""
+    n = D.shape[0]
+    visited = np.zeros(n, dtype=np.bool_)
+    visited[0] = True
+    order = np.empty(n - 1, dtype=np.int64)
+    cur = 0
+    total_distance = 0.0
+
+    for step in range(n - 1):
+        best_j = -1
+        best_d = 0.0
+        for j in range(1, n):
+            if visited[j]:
+                continue
+            d = D[cur, j]
+            if best_j < 0 or d < best_d:
+                best_j = j
+                best_d = d
+
+        order[step] = best_j - 1
+        visited[best_j] = True
+        total_distance += best_d
+        cur = best_j
+
+    return order, total_distance
+
+
+if njit is not None:
+    _nn_tour = njit(cache=True, fastmath=True)(_nn_tour)
+    # Compile (or load from cache) now instead of on the first request
+    _nn_tour(np.zeros((2, 2), dtype=np.float32))
+
+
+def _nn_order_balltree(cur_lat, cur_lon, lats_rad, lons_rad):
+    """
+    Nearest Neighbor visiting order using a haversine BallTree.
+
+    The tree is rebuilt over the unvisited bins every ~sqrt(N) steps.
+    Between rebuilds at most `stale` points in the tree are already
+    visited, so querying k = stale + 1 always yields an unvisited bin.
+    """
+    n = len(lats_rad)
+    coords = np.column_stack((lats_rad, lons_rad))
+    visited = np.zeros(n, dtype=bool)
+    rebuild_every = max(1, int(math.sqrt(n)))
+
+    order = []
+    total_distance = 0.0
+    current = np.array([[cur_lat, cur_lon]])
+    stale = rebuild_every
+
+    while len(order) < n:
+        if stale >= rebuild_every:
+            live = np.flatnonzero(~visited)
+            tree = BallTree(coords[live], metric="haversine")
+            stale = 0
+
+        dist, idx = tree.query(current, k=min(stale + 1, len(live)))
+        for d, i in zip(dist[0], idx[0]):
+            nearest = int(live[i])
+            if not visited[nearest]:
+                break
+
+        total_distance += float(d) * EARTH_RADIUS_KM
+
+        order.append(nearest)
+        visited[nearest] = True
+        current = coords[nearest:nearest + 1]
+        stale += 1
+
+    return order, total_distance
+
+
+def two_opt(order, D):
+    """
+    Improve a Nearest Neighbor tour with 2-opt segment reversals.
+
+    order: bin indices (0-based) starting from the truck
+    D: matrix from route_distance_matrix(), row/column 0 being the truck
+
+    For each position the best reversal is found with one vectorized
+    pass over all segment ends; sweeps repeat until nothing improves.
+    The route is open (it ends at the last bin), so reversing the tail
+    only replaces one edge. Returns the new order and its length in km.
+    """
+    path = np.concatenate(([0], np.asarray(order, dtype=np.int64) + 1))
+    n = len(path)
+
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            a, b = path[i - 1], path[i]
+            ends = path[i + 1:]   # last node of the reversed segment
+            nexts = path[i + 2:]  # node after it (none for the tail)
+            delta = D[a, ends] - D[a, b]
+            delta[:-1] += D[b, nexts] - D[ends[:-1], nexts]
+            k = int(np.argmin(delta))
+            if delta[k] < -1e-6:  # ignore float32 noise below a millimetre
+                path[i:i + k + 2] = path[i:i + k + 2][::-1]
+                improved = True
+
+    return list(path[1:] - 1), float(D[path[:-1], path[1:]].sum())
+
+
+def route_distance_matrix(truck_pos, coords):
+    """
+    Distance matrix (km) for the truck + bin coords, row/column 0 being the truck.
+
+    Returns None when there are more than MATRIX_MAX_BINS bins.
+    """
+    if len(coords) > MATRIX_MAX_BINS:
+        return None
+    pts = _with_truck(truck_pos, coords)
+    if simsimd is not None and np.ptp(pts, axis=0).max() <= PLANAR_MAX_SPAN_DEG:
+        return planar_matrix(pts)
+    return haversine_matrix(*_prep(pts))
+
+
+def optimize_route_tsp(truck_pos, bins, D=None, coords=None):
+    """
+    Solve a basic TSP using the Nearest Neighbor heuristic
+    (plus a 2-opt pass when the distance matrix is available).
     
     truck_pos: { "lat": float, "lon": float }
     bins: [ { "lat": float, "lon": float, ... }, ... ]
+    D: optional matrix from route_distance_matrix(), reused if given
+    coords: optional (N, 2) float32 (lat, lon) rows for bins, e.g. from coord_table
 
     Returns:
         - ordered list of bins (optimal path)
@@ -188,32 +540,29 @@ def optimize_route_tsp(truck_pos, bins):
     if not bins:
         return [], 0.0
 
-    remaining = bins[:]  # clone list to avoid mutation
-    route = []
-    current = truck_pos
-    total_distance = 0.0
+    if coords is None:
+        coords = bin_coords(bins)
 
-    while remaining:
-        # Find nearest bin
-        nearest = min(
-            remaining,
-            key=lambda b: calculate_distance(
-                current["lat"], current["lon"], b["lat"], b["lon"]
-            )
-        )
-
-        # Add distance to route
-        dist = calculate_distance(
-            current["lat"], current["lon"], nearest["lat"], nearest["lon"]
-        )
-        total_distance += dist
+    if D is None:
+        # Do all the trig once; the tour itself is then only lookups
+        D = route_distance_matrix(truck_pos, coords)
 
-        # Move to next bin
-        route.append(nearest)
-        remaining.remove(nearest)
-        current = nearest
+    if D is not None:
+        if njit is not None:
+            order, total_distance = _nn_tour(D)
+        else:
+            order, total_distance = _nn_order_matrix(D)
+        order, total_distance = two_opt(order, D)
+    else:
+        # Too many bins for a matrix: pack coordinates (truck first) instead
+        lats, lons, cos_lats = _prep(_with_truck(truck_pos, coords))
+        # A tree only pays off once the O(N^2) scan gets large
+        if BallTree is not None and len(bins) >= BALLTREE_MIN_BINS:
+            order, total_distance = _nn_order_balltree(lats[0], lons[0], lats[1:], lons[1:])
+        else:
+            order, total_distance = _nn_order_scan(lats, lons, cos_lats)
 
-    return route, total_distance
+    return [bins[i] for i in order], total_distance
 
 # ============================================
 # ARDUINO READER THREAD
@@ -222,26 +571,28 @@ def read_arduino_data():
     """Continuously read sensor data from Arduino"""
     print("🔄 Arduino reader thread started")
     while True:
-        if arduino:
-            try:
-                if arduino.in_waiting > 0:
-                    line = arduino.readline().decode('utf-8', errors='ignore').strip()
-                    if line.startswith("DATA|"):
-                        parts = line.replace("DATA|", "").split("|")
-                        if len(parts) >= 1:
-                            fill_level = float(parts[0])
-                            if "1" in dustbins:
-                                dustbins["1"]["fill"] = fill_level
-                                if fill_level >= 80:
-                                    dustbins["1"]["status"] = "FULL"
-                                elif fill_level >= 50:
-                                    dustbins["1"]["status"] = "MEDIUM"
-                                else:
-                                    dustbins["1"]["status"] = "EMPTY"
-                            print(f"📊 Sensor: Bin 1 = {fill_level:.0f}%")
-            except Exception as e:
-                pass
-        time.sleep(0.5)
+        try:
+            # Blocks until a full line arrives (or the port timeout expires)
+            raw = arduino.readline()
+            # Parse the bytes directly; a line cut short by the timeout has no newline
+            if raw.startswith(b"DATA|") and raw.endswith(b"\n"):
+                # float() accepts bytes and ignores the trailing \r\n
+                fill_level = float(raw[5:].split(b"|", 1)[0])
+                if fill_level >= 80:
+                    status = "FULL"
+                elif fill_level >= 50:
+                    status = "MEDIUM"
+                else:
+                    status = "EMPTY"
+                with _state_lock:
+                    if "1" in dustbins:
+                        dustbins["1"].update(fill=fill_level, status=status)
+                logger.debug("📊 Sensor: Bin 1 = %.0f%%", fill_level)
+        except ValueError:
+            pass
+        except Exception as e:
+            # Port went away; back off instead of spinning on the error
+            time.sleep(0.5)
 
 if arduino:
     reader_thread = threading.Thread(target=read_arduino_data, daemon=True)
@@ -254,9 +605,9 @@ if arduino:
 @app.route('/')
 def home():
     """API status page"""
-    local_ip = get_local_ip()
+    local_ip = LOCAL_IP
     protocol = "https" if use_https else "http"
-    return jsonify({
+    return ojson({
         "status": "running",
         "arduino": "connected" if arduino else "not connected",
         "https": use_https,
@@ -271,14 +622,11 @@ def home():
 def dashboard():
     """Serve dashboard HTML"""
     try:
-        return send_file('dashboard.html')
+        return send_file('dashboard.html', conditional=True, max_age=3600)
     except:
-        return jsonify({"error": "dashboard.html not found"}), 404
+        return ojson({"error": "dashboard.html not found"}, 404)
 
-@app.route('/gps')
-def gps_page():
-    """Mobile GPS tracker page"""
-    html = '''<!DOCTYPE html>
+GPS_HTML = '''<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
@@ -400,11 +748,7 @@ def gps_page():
             var lon = pos.coords.longitude;
             var acc = pos.coords.accuracy.toFixed(0);
 
-            fetch('/api/truck', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ lat: lat, lon: lon })
-            }).catch(function(e) { console.error(e); });
+            sendPosition(lat, lon);
 
             document.getElementById('status').innerHTML = 
                 '<div class="success">TRACKING ACTIVE</div>' +
@@ -414,6 +758,21 @@ def gps_page():
                 '<div class="coords">Updates: ' + updateCount + '</div>';
         }
 
+        function sendPosition(lat, lon) {
+            var body = JSON.stringify({ lat: lat, lon: lon });
+            // Fire-and-forget; fall back to a keepalive fetch if the beacon is refused
+            if (navigator.sendBeacon &&
+                navigator.sendBeacon('/api/truck', new Blob([body], { type: 'application/json' }))) {
+                return;
+            }
+            fetch('/api/truck', {
+                method: 'POST',
+                keepalive: true,
+                headers: { 'Content-Type': 'application/json' },
+                body: body
+            }).catch(function(e) { console.error(e); });
+        }
+
         function handleError(err) {
             var msg = 'GPS Error: ';
             if (err.code === 1) msg += 'Permission denied';
@@ -427,90 +786,113 @@ def gps_page():
         }
     </script>
 </body>
-</html>'''
-    return html
+</html>'''.encode('utf-8')
+GPS_ETAG = hashlib.md5(GPS_HTML).hexdigest()
+
+@app.route('/gps')
+def gps_page():
+    """Mobile GPS tracker page"""
+    resp = Response(GPS_HTML, mimetype='text/html')
+    resp.set_etag(GPS_ETAG)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = 3600
+    return resp.make_conditional(request)
 
 @app.route('/api/dustbins', methods=['GET'])
 def get_dustbins():
-    return jsonify(dustbins)
+    bins, _ = snapshot_state()
+    return ojson(bins)
 
 @app.route('/api/dustbins', methods=['POST'])
 def add_dustbin():
     try:
         data = request.json
-        new_id = str(max([int(k) for k in dustbins.keys()], default=0) + 1)
-        dustbins[new_id] = {
-            "name": data.get('name', f'Bin {new_id}'),
-            "location": data.get('location', 'Unknown'),
-            "lat": float(data.get('lat', 19.31)),
-            "lon": float(data.get('lon', 84.02)),
-            "fill": 0,
-            "status": "EMPTY"
-        }
-        return jsonify({"message": "Added", "id": new_id}), 201
+        lat = float(data.get('lat', 19.31))
+        lon = float(data.get('lon', 84.02))
+        with _state_lock:
+            new_id = str(next(_next_id))
+            dustbins[new_id] = {
+                "name": data.get('name', f'Bin {new_id}'),
+                "location": data.get('location', 'Unknown'),
+                "lat": lat,
+                "lon": lon,
+                "fill": 0,
+                "status": "EMPTY"
+            }
+            _store_coords(new_id, lat, lon)
+        return ojson({"message": "Added", "id": new_id}, 201)
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return ojson({"error": str(e)}, 400)
 
 @app.route('/api/dustbins/<bin_id>', methods=['DELETE'])
 def delete_dustbin(bin_id):
-    if bin_id in dustbins:
-        del dustbins[bin_id]
-        return jsonify({"message": "Deleted"}), 200
-    return jsonify({"error": "Not found"}), 404
+    with _state_lock:
+        found = dustbins.pop(bin_id, None) is not None
+        if found:
+            _drop_coords(bin_id)
+    if found:
+        return ojson({"message": "Deleted"}, 200)
+    return ojson({"error": "Not found"}, 404)
 
 @app.route('/api/truck', methods=['GET'])
 def get_truck():
-    return jsonify(truck)
+    _, truck_pos = snapshot_state()
+    return ojson(truck_pos)
 
 @app.route('/api/truck', methods=['POST'])
 def update_truck():
     try:
         data = request.json
-        truck["lat"] = float(data.get('lat', truck["lat"]))
-        truck["lon"] = float(data.get('lon', truck["lon"]))
-        truck["timestamp"] = datetime.now().isoformat()
-        print(f"📍 Truck: ({truck['lat']:.6f}, {truck['lon']:.6f})")
-        return jsonify({"status": "updated"})
+        now = time.time()
+        with _state_lock:
+            lat = float(data.get('lat', truck["lat"]))
+            lon = float(data.get('lon', truck["lon"]))
+            if (truck["timestamp"] is not None
+                    and now - truck["timestamp"] < TRUCK_MIN_INTERVAL_S
+                    and calculate_distance(truck["lat"], truck["lon"], lat, lon) < TRUCK_MIN_MOVE_KM):
+                return ojson({"status": "skipped"})
+            truck.update(lat=lat, lon=lon, timestamp=now)
+        logger.debug("📍 Truck: (%.6f, %.6f)", lat, lon)
+        return ojson({"status": "updated"})
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return ojson({"error": str(e)}, 400)
 
 @app.route('/api/optimize', methods=['GET'])
 def optimize_route():
     try:
+        with _state_lock:
+            truck_pos = truck.copy()
+            # Get all bins >= 50% for collection
+            bins_to_collect = [
+                {"id": bid, "name": b["name"], "lat": b["lat"], "lon": b["lon"], "fill": b["fill"]}
+                for bid, b in dustbins.items() if b["fill"] >= 50
+            ]
+            # Matching float32 rows; fancy indexing copies them out of the table
+            coords = coord_table[[id_to_row[b["id"]] for b in bins_to_collect]]
+
         # ❗ Check if we have live GPS
-        if truck["lat"] is None or truck["lon"] is None:
-            return jsonify({
+        if truck_pos["lat"] is None or truck_pos["lon"] is None:
+            return ojson({
                 "error": "Truck GPS not received yet. Open /gps on your phone and press Start Tracking."
-            }), 400
-
-        # Get all bins >= 50% for collection
-        bins_to_collect = [
-            {"id": bid, "name": b["name"], "lat": b["lat"], "lon": b["lon"], "fill": b["fill"]}
-            for bid, b in dustbins.items() if b["fill"] >= 50
-        ]
+            }, 400)
 
         if not bins_to_collect:
-            return jsonify({
+            return ojson({
                 "message": "No bins need collection",
                 "optimal_distance": 0,
                 "route": []
             })
 
         # 🚛➡️ Now route optimization uses *live phone GPS*
-        optimal_route, optimal_distance = optimize_route_tsp(truck, bins_to_collect)
+        D = route_distance_matrix(truck_pos, coords)
+        optimal_route, optimal_distance = optimize_route_tsp(truck_pos, bins_to_collect, D, coords)
 
         # Random route for comparison
-        import random
-        random_bins = bins_to_collect.copy()
-        random.shuffle(random_bins)
-
-        random_distance = 0
-        if len(random_bins) > 1:
-            for i in range(len(random_bins) - 1):
-                random_distance += calculate_distance(
-                    random_bins[i]["lat"], random_bins[i]["lon"],
-                    random_bins[i+1]["lat"], random_bins[i+1]["lon"]
-                )
+        perm = np.random.permutation(len(bins_to_collect))
+        if D is not None:
+            random_distance = float(D[perm[:-1] + 1, perm[1:] + 1].sum())
+        else:
+            random_distance = path_distance(coords[perm])
 
         optimal_fuel = optimal_distance / 12
         fuel_cost = optimal_fuel * 100
@@ -518,7 +900,7 @@ def optimize_route():
         savings = (random_distance/12 - optimal_fuel) * 100 if random_distance > 0 else 0
         efficiency = ((random_distance - optimal_distance) / random_distance * 100) if random_distance > 0 else 0
 
-        return jsonify({
+        return ojson({
             "optimal_distance": round(optimal_distance, 2),
             "random_distance": round(random_distance, 2),
             "optimal_fuel": round(optimal_fuel, 2),
@@ -529,13 +911,14 @@ def optimize_route():
         })
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
 
 
 @app.route('/api/predictions', methods=['GET'])
 def get_predictions():
+    bins, _ = snapshot_state()
     preds = []
-    for bid, b in dustbins.items():
+    for bid, b in bins.items():
         if b["fill"] < 100:
             days = (100 - b["fill"]) / 15
             urgency = "CRITICAL" if b["fill"] >= 80 else "HIGH" if b["fill"] >= 60 else "MEDIUM"
@@ -546,13 +929,13 @@ def get_predictions():
                 "days_until_full": round(days, 1),
                 "urgency": urgency
             })
-    return jsonify(sorted(preds, key=lambda x: x["days_until_full"]))
+    return ojson(sorted(preds, key=lambda x: x["days_until_full"]))
 
 # ============================================
 # START SERVER
 # ============================================
 if __name__ == '__main__':
-    local_ip = get_local_ip()
+    local_ip = LOCAL_IP
     protocol = "https" if use_https else "http"
     
     print("\n" + "="*70)
@@ -566,8 +949,19 @@ if __name__ == '__main__':
         print(f"\n⚠️  Accept security warning on phone (self-signed certificate)")
     print("="*70 + "\n")
     
-    if use_https:
-        app.run(debug=True, host='0.0.0.0', port=5000, 
-                ssl_context=(cert_file, key_file), use_reloader=False)
+    if WSGIServer is not None:
+        # Production server: thread pool + its own TLS (waitress has no HTTPS)
+        server = WSGIServer(('0.0.0.0', 5000), app, numthreads=8)
+        if use_https:
+            server.ssl_adapter = BuiltinSSLAdapter(cert_file, key_file)
+        try:
+            server.start()
+        except KeyboardInterrupt:
+            server.stop()
     else:
-        app.run(debug=True, host='0.0.0.0', port=5000, use_reloader=False)
\ No newline at end of file
+        print("⚠️  cheroot not installed, falling back to Flask's built-in server")
+        if use_https:
+            app.run(host='0.0.0.0', port=5000, threaded=True,
+                    ssl_context=(cert_file, key_file), use_reloader=False)
+        else:
+            app.run(host='0.0.0.0', port=5000, threaded=True, use_reloader=False)